@@ -3,14 +3,24 @@ Complete Betfair Bot Dashboard with Live Betting Integration
 Fixed version with proper balance tracking and state management
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-import json
+import orjson
+import copy
+import gzip
+import hashlib
+import html
+import itertools
+import queue
+import random
 import threading
-import time
 from datetime import datetime
-from collections import deque
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import atexit
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import os
 
 # Import your bot components
@@ -23,25 +33,86 @@ except ImportError:
     BETFAIR_AVAILABLE = False
     print("⚠️ Betfair modules not available - running in demo mode")
 
+# Shared by every bot run: decisions depend only on prices and field size,
+# so its decision cache stays valid across restarts
+CALCULATOR = BettingCalculator() if BETFAIR_AVAILABLE else None
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # jsonify: hand orjson's bytes straight to the response instead of
+        # decoding to str for Werkzeug to encode back
+        # Same argument handling as jsonify's default provider
+        if args and kwargs:
+            raise TypeError("jsonify() behavior undefined when passed both args and kwargs")
+        if len(args) == 1:
+            obj = args[0]
+        else:
+            obj = args or kwargs or None
+        body = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype="application/json")
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)
 
+def new_stats(balance=0.0):
+    """Fresh bot statistics, carrying over the account balance"""
+    return {
+        "total_bets": 0,
+        "total_stake": 0,
+        "total_exposure": 0,
+        "successful_bets": 0,
+        "failed_bets": 0,
+        "last_bet_time": None,
+        "balance": balance
+    }
+
 # Global state
 bot_running = False
 bot_thread = None
-bot_logs = deque(maxlen=100)
-bot_stats = {
-    "total_bets": 0,
-    "total_stake": 0,
-    "total_exposure": 0,
-    "successful_bets": 0,
-    "failed_bets": 0,
-    "last_bet_time": None,
-    "balance": 0.0  # Initialize balance
-}
+bot_stop_event = threading.Event()
+bot_logs = deque(maxlen=100)  # (seq, JSON-encoded entry) pairs
+log_counter = itertools.count(1)
+# New on every server start: log seqs restart from 1, so clients reset
+# the seq they track when this changes
+SERVER_ID = os.urandom(8).hex()
+last_log_seq = 0
+_initial_stats = new_stats()
+# (version, stats dict, stats encoded once per change); version is bumped
+# on every change
+stats_snapshot = (0, _initial_stats, orjson.Fragment(orjson.dumps(_initial_stats)))
 bot_instance = None
 bot_lock = threading.Lock()
 
+# Stats are copy-on-write: writers (serialised by stats_lock) build a new
+# dict and publish it with set_stats, which replaces stats_snapshot in a
+# single assignment, so readers take one consistent snapshot without locking
+stats_lock = threading.Lock()
+
+# Most recent market ids remembered as processed (oldest evicted first).
+# Races still listed are refreshed every scan and a scan lists at most 100,
+# so about a day's Australian card is plenty
+MAX_PROCESSED_RACES = 512
+
+# Shortest wait between scans when a race is about to start
+MIN_CHECK_INTERVAL_SECONDS = 5
+
+# Retry delays after a failed scan (doubled per consecutive failure)
+INITIAL_ERROR_BACKOFF_SECONDS = 2
+MAX_ERROR_BACKOFF_SECONDS = 300
+
+# Dashboard push channel: one queue per connected event stream
+event_subscribers = set()
+subscribers_lock = threading.Lock()
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -49,70 +120,260 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def format_event(event, data, event_id=None):
+    """Encode a server-sent event message"""
+    message = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{message}event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+def close_subscriber(subscriber):
+    """Make a subscriber's event stream end (call with subscribers_lock held)"""
+    # Only publishers add to the queue and they hold the lock, so once it
+    # is drained the end marker fits
+    while True:
+        try:
+            subscriber.get_nowait()
+        except queue.Empty:
+            break
+    subscriber.put_nowait(None)
+
+def publish_event(event, data, event_id=None):
+    """Push an event to every connected dashboard stream"""
+    message = format_event(event, data, event_id)
+    with subscribers_lock:
+        for subscriber in list(event_subscribers):
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Slow client: rather than silently lose events, end its stream
+                # so the browser reconnects and resyncs from /api/status
+                event_subscribers.discard(subscriber)
+                close_subscriber(subscriber)
+
+class DashboardLogHandler(logging.Handler):
+    """Logging handler feeding the dashboard log buffer and event streams"""
+    
+    def emit(self, record):
+        global last_log_seq
+        try:
+            # Escape and encode each entry once as a ready-to-insert dashboard
+            # line; status responses and event streams embed the fragment
+            # instead of re-encoding it per request
+            line = f'<div class="log-entry">{html.escape(self.format(record))}</div>'
+            log_entry = orjson.Fragment(orjson.dumps(line))
+            with bot_lock:
+                seq = next(log_counter)
+                bot_logs.append((seq, log_entry))
+                last_log_seq = seq
+            publish_event('log', {"seq": seq, "entry": log_entry}, event_id=seq)
+        except Exception:
+            self.handleError(record)
+
+# Dashboard activity log: shown in the dashboard and echoed to the console.
+# add_log only enqueues the record; a listener thread does the buffering,
+# event publishing and console output off the bot's betting path
+dashboard_logger = logging.getLogger(f"{__name__}.dashboard")
+dashboard_handler = DashboardLogHandler()
+dashboard_handler.setFormatter(logging.Formatter('[%(asctime)s] %(message)s', datefmt='%H:%M:%S'))
+dashboard_queue = queue.SimpleQueue()
+dashboard_logger.addHandler(QueueHandler(dashboard_queue))
+dashboard_logger.propagate = False  # The listener writes console output too
+dashboard_listener = QueueListener(dashboard_queue, dashboard_handler, *logging.getLogger().handlers)
+dashboard_listener.start()
+atexit.register(dashboard_listener.stop)  # Flush queued entries on exit
+
 def add_log(message):
     """Add timestamped log entry"""
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    log_entry = f"[{timestamp}] {message}"
-    bot_logs.append(log_entry)
-    logger.info(message)
+    dashboard_logger.info(message)
 
-def get_recent_logs(count=50):
-    """Get recent log entries"""
-    return list(bot_logs)[-count:]
+def set_stats(stats):
+    """
+    Publish a new stats dict (call with stats_lock held)
+    
+    Returns:
+        dict: Stats event payload for the dashboard streams
+    """
+    global stats_snapshot
+    version = stats_snapshot[0] + 1
+    stats_json = orjson.Fragment(orjson.dumps(stats))
+    stats_snapshot = (version, stats, stats_json)
+    return {"stats_version": version, "stats": stats_json}
 
-def load_config():
-    """Load configuration from file"""
+def update_stats(increments=None, **values):
+    """Apply stat changes and push the new totals to the dashboard"""
+    with stats_lock:
+        stats = dict(stats_snapshot[1], **values)
+        for key, amount in (increments or {}).items():
+            stats[key] += amount
+        event = set_stats(stats)
+    publish_event('stats', event)
+
+def set_bot_running(running):
+    """Update bot running flag and notify the dashboard"""
+    global bot_running
+    bot_running = running
+    publish_event('status', {"status": "running" if running else "stopped"})
+
+def get_recent_logs(since=0, count=50):
+    """
+    Get up to `count` most recent log entries newer than sequence `since`
+    
+    Returns:
+        tuple: (latest log sequence number, list of (seq, JSON-encoded entry) pairs)
+    """
+    recent = []
+    with bot_lock:
+        latest_seq = last_log_seq
+        # Walk back from the newest entry so delta polls only touch new logs
+        for seq, entry in itertools.islice(reversed(bot_logs), count):
+            if seq <= since:
+                break
+            recent.append((seq, entry))
+    recent.reverse()
+    return latest_seq, recent
+
+# Default configuration used when config.json is missing or unreadable
+DEFAULT_CONFIG = {
+    "account": {
+        "balance": 0,
+        "currency": "AUD"
+    },
+    "betting": {
+        "min_odds": 2.0,
+        "max_odds": 10.0,
+        "stake": 2.0,
+        "min_runners": 8,
+        "max_runners": 14,
+        "per_race_stop_loss": 20.0,
+        "check_interval_seconds": 60,
+        "max_bets_per_second": 5
+    },
+    "session_token": "",
+    "app_key": ""
+}
+
+# Parsed config.json, re-read only when the file's mtime changes, plus
+# its masked dashboard view built alongside it
+_config_cache = None
+_config_display = None
+_config_mtime = None
+_config_lock = threading.Lock()
+
+def mask_secret(value):
+    """Sanitize a credential for display"""
+    if not value:
+        return ""
+    if len(value) > 10:
+        return value[:10] + "..." + value[-4:]
+    return value[:4] + "..."
+
+def _build_display_config(config):
+    """Betting settings with credentials masked, as shown on the dashboard"""
+    return {
+        **config.get('betting', {}),
+        "session_token": mask_secret(config.get('session_token')),
+        "app_key": mask_secret(config.get('app_key'))
+    }
+
+def _config_file_mtime():
+    """Modification time of config.json in ns, or None if missing"""
+    try:
+        return os.stat('config.json').st_mtime_ns
+    except OSError:
+        return None
+
+def _read_config_file():
+    """Read configuration from file"""
     try:
         if os.path.exists('config.json'):
-            with open('config.json', 'r') as f:
-                return json.load(f)
+            with open('config.json', 'rb') as f:
+                return orjson.loads(f.read())
     except Exception as e:
         logger.error(f"Error loading config: {e}")
     
-    # Default config
-    return {
-        "account": {
-            "balance": 0,
-            "currency": "AUD"
-        },
-        "betting": {
-            "min_odds": 2.0,
-            "max_odds": 10.0,
-            "stake": 2.0,
-            "min_runners": 8,
-            "max_runners": 14,
-            "per_race_stop_loss": 20.0,
-            "check_interval_seconds": 60
-        },
-        "session_token": "",
-        "app_key": ""
-    }
+    return copy.deepcopy(DEFAULT_CONFIG)
 
-def save_config(config):
-    """Save configuration to file"""
+def load_config():
+    """Load configuration (cached - treat the result as read-only)"""
+    global _config_cache, _config_display, _config_mtime
+    with _config_lock:
+        # A stat per call picks up hand edits to config.json without re-parsing it every time
+        mtime = _config_file_mtime()
+        if _config_cache is None or mtime != _config_mtime:
+            _config_cache = _read_config_file()
+            _config_display = _build_display_config(_config_cache)
+            _config_mtime = mtime
+        return _config_cache
+
+def load_display_config():
+    """Masked configuration for the dashboard (cached with the config)"""
+    load_config()
+    return _config_display
+
+# config.json writes run in order on one background thread, so saving
+# from a request never waits on the disk
+_config_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='config-writer')
+
+def _write_config_file(config):
+    """Write config.json (runs on the config writer thread)"""
+    global _config_mtime
     try:
-        with open('config.json', 'w') as f:
-            json.dump(config, f, indent=4)
-        return True
+        # Write a temp file then rename over config.json, so a crash
+        # mid-write never leaves a truncated config behind
+        tmp_path = 'config.json.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+        with _config_lock:
+            os.replace(tmp_path, 'config.json')
+            # Our own write - keep serving the cache (which may already
+            # hold a newer config queued behind this one)
+            _config_mtime = _config_file_mtime()
+        add_log("⚙️ Configuration saved successfully")
     except Exception as e:
         logger.error(f"Error saving config: {e}")
-        return False
+        add_log("❌ Could not write config.json - settings apply until restart only")
+
+def save_config(config):
+    """
+    Replace the cached configuration and queue writing it to file
+    
+    The write happens on the config writer thread, which reports success
+    or failure in the dashboard activity log.
+    """
+    global _config_cache, _config_display, _config_mtime
+    with _config_lock:
+        _config_cache = config
+        _config_display = _build_display_config(config)
+        # The file is still the old one until the write lands - don't let
+        # load_config mistake that for a hand edit and re-read it
+        _config_mtime = _config_file_mtime()
+    _config_writer.submit(_write_config_file, config)
 
 class BotRunner:
     """Wrapper for bot execution"""
     
     def __init__(self, config):
         self.config = config
+        
+        # Betting settings are fixed for the life of the runner
+        # (config changes apply on bot restart)
+        betting = config['betting']
+        self.stake = betting['stake']
+        self.min_runners = betting.get('min_runners', 8)
+        self.max_runners = betting.get('max_runners', 14)
+        self.runner_range = range(self.min_runners, self.max_runners + 1)
+        self.per_race_stop_loss = betting.get('per_race_stop_loss', 20.0)
+        self.max_bets_per_second = max(1, int(betting.get('max_bets_per_second', 5)))
+        self.check_interval = betting.get('check_interval_seconds', 60)
+        
         self.client = None
-        self.calculator = BettingCalculator() if BETFAIR_AVAILABLE else None
         self.bet_manager = None
         self.running = False
-        self.processed_races = set()
+        self.stop_event = threading.Event()
+        self.processed_races = OrderedDict()  # Bounded LRU of market ids
+        self.place_market_ids = {}  # Win market id -> place market id
         
     def initialize(self):
         """Initialize bot connection"""
-        global bot_stats
-        
         if not BETFAIR_AVAILABLE:
             add_log("⚠️ Betfair modules not available - Demo mode")
             return False
@@ -127,7 +388,8 @@ class BotRunner:
             
             self.client = BetfairClient(
                 app_key=self.config['app_key'],
-                session_token=self.config['session_token']
+                session_token=self.config['session_token'],
+                max_bets_per_second=self.max_bets_per_second
             )
             
             if not self.client.connect():
@@ -139,15 +401,14 @@ class BotRunner:
             
             # Initialize bet manager
             self.bet_manager = BetManager(
-                stake=self.config['betting']['stake'],
-                per_race_stop_loss=self.config['betting'].get('per_race_stop_loss', 20.0)
+                stake=self.stake,
+                per_race_stop_loss=self.per_race_stop_loss
             )
             
             # Check and update balance
             balance = self.client.get_account_balance()
             if balance is not None:
-                with bot_lock:
-                    bot_stats['balance'] = float(balance)
+                update_stats(balance=float(balance))
                 add_log(f"💰 Account balance: ${balance:.2f}")
             else:
                 add_log("⚠️ Could not retrieve account balance")
@@ -159,70 +420,119 @@ class BotRunner:
             logger.exception("Initialization error details:")
             return False
     
+    def stop(self):
+        """Signal the bot loop to stop and wake it from any wait"""
+        self.running = False
+        self.stop_event.set()
+    
     def update_balance(self):
         """Update account balance"""
-        global bot_stats
         try:
             if self.client:
                 balance = self.client.get_account_balance()
                 if balance is not None:
-                    with bot_lock:
-                        bot_stats['balance'] = float(balance)
+                    update_stats(balance=float(balance))
         except Exception as e:
             logger.error(f"Error updating balance: {e}")
     
-    def process_race(self, market_catalogue):
-        """Process a single race"""
-        global bot_stats
+    def is_processed(self, market_id):
+        """Check if a race has been processed, refreshing its LRU position"""
+        if market_id in self.processed_races:
+            self.processed_races.move_to_end(market_id)
+            return True
+        return False
+    
+    def mark_processed(self, market_id):
+        """Remember a race as processed, evicting the oldest beyond the cap"""
+        self.processed_races[market_id] = None
+        self.place_market_ids.pop(market_id, None)  # Never looked up again
+        if len(self.processed_races) > MAX_PROCESSED_RACES:
+            self.processed_races.popitem(last=False)
+    
+    def needs_analysis(self, market_catalogue):
+        """Check whether a race still has to be analysed"""
+        market_id = market_catalogue.market_id
+        
+        # Skip if already processed
+        if self.is_processed(market_id):
+            return False
+        
+        num_runners = len(market_catalogue.runners)
+        
+        # Check runner count
+        if num_runners not in self.runner_range:
+            add_log(f"⏭️ {market_catalogue.event.name} [{market_id}]: {num_runners} runners (need {self.min_runners}-{self.max_runners})")
+            self.mark_processed(market_id)
+            return False
+        
+        return True
+    
+    def fetch_race_markets(self, races):
+        """
+        Fetch market data for a batch of races
+        
+        Returns:
+            list: (win_market, place_market_id, place_market) per race, None where
+                unavailable; the whole entry is None when the race's place market
+                lookup failed (retry on the next scan)
+        """
+        # Place markets for every race not yet resolved, in one catalogue request
+        lookups = [race for race in races if race.market_id not in self.place_market_ids]
+        failed_lookups = set()
+        if lookups:
+            found = self.client.get_place_market_ids(lookups)
+            if found is None:
+                add_log(f"⚠️ Place market lookup failed for {len(lookups)} race(s) - retrying next scan")
+                failed_lookups = {race.market_id for race in lookups}
+            else:
+                self.place_market_ids.update(found)
+        place_market_ids = [self.place_market_ids.get(race.market_id) for race in races]
+        
+        # Prices for every win and place market in one batched request
+        market_ids = [race.market_id for race in races if race.market_id not in failed_lookups]
+        market_ids += [place_id for place_id in place_market_ids if place_id]
+        market_books = self.client.get_market_prices_batch(market_ids) if market_ids else {}
+        
+        return [
+            None if race.market_id in failed_lookups else
+            (market_books.get(race.market_id), place_id, market_books.get(place_id))
+            for race, place_id in zip(races, place_market_ids)
+        ]
+    
+    def process_race(self, market_catalogue, win_market, place_market_id, place_market):
+        """Process a single race using its prefetched market data"""
+        market_id = market_catalogue.market_id
+        race_label = f"{market_catalogue.event.name} [{market_id}]"  # Names the race in every log line
         
         try:
-            market_id = market_catalogue.market_id
-            event_name = market_catalogue.event.name
-            
-            # Skip if already processed
-            if market_id in self.processed_races:
-                return
-            
             num_runners = len(market_catalogue.runners)
-            min_runners = self.config['betting'].get('min_runners', 8)
-            max_runners = self.config['betting'].get('max_runners', 14)
             
-            # Check runner count
-            if num_runners < min_runners or num_runners > max_runners:
-                add_log(f"⏭️ {event_name}: {num_runners} runners (need {min_runners}-{max_runners})")
-                self.processed_races.add(market_id)
-                return
-            
-            add_log(f"🏇 Analyzing: {event_name} ({num_runners} runners)")
+            add_log(f"🏇 Analyzing: {race_label} ({num_runners} runners)")
             
-            # Get market data
-            win_market = self.client.get_market_prices(market_id)
             if not win_market:
-                add_log(f"⚠️ No win market data for {event_name}")
+                add_log(f"⚠️ No win market data for {race_label}")
                 return
             
-            place_market_id = self.client.get_place_market_id(market_id)
             if not place_market_id:
-                add_log(f"⚠️ No place market for {event_name}")
-                self.processed_races.add(market_id)
+                add_log(f"⚠️ No place market for {race_label}")
+                self.mark_processed(market_id)
                 return
             
-            place_market = self.client.get_market_prices(place_market_id)
             if not place_market:
-                add_log(f"⚠️ No place market prices for {event_name}")
+                add_log(f"⚠️ No place market prices for {race_label}")
                 return
             
-            # Process runners
-            bets_placed = 0
+            # Index runners by selection once instead of scanning per runner
+            win_by_selection = {r.selection_id: r for r in win_market.runners}
+            place_by_selection = {r.selection_id: r for r in place_market.runners}
+            
+            # Collect prices for runners quoted in both markets
+            quoted_runners = []
             for runner_cat in market_catalogue.runners:
-                if not self.running:
-                    break
-                
-                runner_name = runner_cat.runner_name
                 selection_id = runner_cat.selection_id
                 
                 # Get prices
-                win_runner = next((r for r in win_market.runners if r.selection_id == selection_id), None)
+                win_runner = win_by_selection.get(selection_id)
                 if not win_runner:
                     continue
                 
@@ -230,7 +540,7 @@ class BotRunner:
                 if not win_lay_price:
                     continue
                 
-                place_runner = next((r for r in place_market.runners if r.selection_id == selection_id), None)
+                place_runner = place_by_selection.get(selection_id)
                 if not place_runner:
                     continue
                 
@@ -238,83 +548,132 @@ class BotRunner:
                 if not place_back_price:
                     continue
                 
-                # Calculate if should bet
-                should_bet, details = self.calculator.should_bet(
-                    win_lay_price=win_lay_price,
-                    actual_place_price=place_back_price,
-                    num_runners=num_runners
+                quoted_runners.append((runner_cat, win_lay_price, place_back_price))
+            
+            # Calculate which runners to bet on for the whole field at once
+            decisions = CALCULATOR.should_bet_batch(
+                win_lay_prices=[win_lay for _, win_lay, _ in quoted_runners],
+                actual_place_prices=[place_back for _, _, place_back in quoted_runners],
+                num_runners=num_runners
+            )
+            
+            # Process bet signals
+            bets_placed = 0
+            for (runner_cat, win_lay_price, place_back_price), (should_bet, edge) in zip(quoted_runners, decisions):
+                if not self.running:
+                    break
+                
+                if not should_bet:
+                    continue
+                
+                runner_name = runner_cat.runner_name
+                selection_id = runner_cat.selection_id
+                add_log(f"💡 BET SIGNAL: {race_label} - {runner_name} @ {place_back_price} (Edge: {edge:.2%})")
+                
+                # Check stop loss
+                if not self.bet_manager.can_bet_on_race(market_id):
+                    add_log(f"🛑 Stop loss reached for {race_label}")
+                    break
+                
+                # Place bet
+                stake = self.stake
+                add_log(f"🎯 Placing bet: {race_label} - ${stake:.2f} on {runner_name} @ {place_back_price}")
+                
+                bet_result = self.client.place_bet(
+                    market_id=place_market_id,
+                    selection_id=selection_id,
+                    stake=stake,
+                    price=place_back_price
                 )
                 
-                if should_bet:
-                    edge = details.get('edge', 0)
-                    add_log(f"💡 BET SIGNAL: {runner_name} @ {place_back_price} (Edge: {edge:.2%})")
-                    
-                    # Check stop loss
-                    if not self.bet_manager.can_bet_on_race(market_id):
-                        add_log(f"🛑 Stop loss reached for {event_name}")
-                        break
-                    
-                    # Place bet
-                    stake = self.config['betting']['stake']
-                    add_log(f"🎯 Placing bet: ${stake:.2f} on {runner_name} @ {place_back_price}")
-                    
-                    bet_result = self.client.place_bet(
-                        market_id=place_market_id,
-                        selection_id=selection_id,
-                        stake=stake,
-                        price=place_back_price
-                    )
-                    
-                    # Record bet
-                    self.bet_manager.record_bet(
-                        market_id=market_id,
-                        runner_name=runner_name,
-                        selection_id=selection_id,
-                        stake=stake,
-                        price=place_back_price,
-                        bet_result=bet_result
-                    )
-                    
-                    # Update stats
-                    with bot_lock:
-                        if bet_result.get('success'):
-                            bet_id = bet_result.get('bet_id', 'N/A')
-                            add_log(f"✅ BET PLACED: {runner_name} - ID: {bet_id}")
-                            bot_stats['successful_bets'] += 1
-                            bets_placed += 1
-                        else:
-                            error = bet_result.get('error', 'Unknown error')
-                            add_log(f"❌ BET FAILED: {error}")
-                            bot_stats['failed_bets'] += 1
-                        
-                        bot_stats['total_bets'] += 1
-                        bot_stats['total_stake'] += stake
-                        bot_stats['last_bet_time'] = datetime.now().strftime("%H:%M:%S")
-                    
-                    # Update balance after bet
-                    self.update_balance()
-                    
-                    # Small delay between bets
-                    time.sleep(1)
+                # Record bet
+                bet_record = self.bet_manager.record_bet(
+                    market_id=market_id,
+                    runner_name=runner_name,
+                    selection_id=selection_id,
+                    stake=stake,
+                    price=place_back_price,
+                    bet_result=bet_result
+                )
+                
+                # Update stats
+                if bet_result.get('success'):
+                    bet_id = bet_result.get('bet_id', 'N/A')
+                    add_log(f"✅ BET PLACED: {race_label} - {runner_name} - ID: {bet_id}")
+                    outcome = 'successful_bets'
+                    bets_placed += 1
+                else:
+                    error = bet_result.get('error', 'Unknown error')
+                    add_log(f"❌ BET FAILED: {race_label} - {runner_name}: {error}")
+                    outcome = 'failed_bets'
+                
+                update_stats(
+                    increments={outcome: 1, 'total_bets': 1, 'total_stake': stake},
+                    last_bet_time=bet_record['bet_time']
+                )
+                
+                # Update balance after bet
+                self.update_balance()
             
             if bets_placed == 0:
-                add_log(f"ℹ️ No opportunities in {event_name}")
+                add_log(f"ℹ️ No opportunities in {race_label}")
             else:
-                add_log(f"✅ Placed {bets_placed} bet(s) in {event_name}")
+                add_log(f"✅ Placed {bets_placed} bet(s) in {race_label}")
             
-            self.processed_races.add(market_id)
+            self.mark_processed(market_id)
             
         except Exception as e:
-            add_log(f"❌ Error processing race: {str(e)}")
+            add_log(f"❌ Error processing race {race_label}: {str(e)}")
             logger.exception("Race processing error details:")
     
+    def next_wait_seconds(self, races):
+        """
+        Seconds to wait before the next scan
+        
+        Scans every check_interval while nothing is pending, and more often
+        as the next unprocessed race approaches its start time.
+        """
+        start_times = [
+            race.market_start_time for race in races or []
+            if race.market_start_time and race.market_id not in self.processed_races
+        ]
+        if not start_times:
+            return self.check_interval
+        
+        seconds_to_start = (min(start_times) - datetime.utcnow()).total_seconds()
+        return max(MIN_CHECK_INTERVAL_SECONDS, min(self.check_interval, seconds_to_start / 3))
+    
+    def analyze_races(self, races):
+        """Fetch market data for races still needing analysis and process them"""
+        candidates = [race for race in races if self.needs_analysis(race)]
+        
+        # Fetch market data for every race up front; bet
+        # decisions stay serial below
+        race_markets = self.fetch_race_markets(candidates) if candidates else []
+        
+        for race, markets in zip(candidates, race_markets):
+            if not self.running:
+                break
+            if markets is None:
+                continue  # Place market unknown - left unprocessed for the next scan
+            self.process_race(race, *markets)
+    
+    def forget_finished_markets(self, races):
+        """Drop place ids for races no longer pending"""
+        current = {race.market_id for race in races if race.market_id not in self.processed_races}
+        self.place_market_ids = {
+            market_id: place_id for market_id, place_id in self.place_market_ids.items()
+            if market_id in current
+        }
+    
     def run(self):
         """Main bot loop"""
         self.running = True
+        self.stop_event.clear()
         add_log("🤖 Bot started")
         
-        check_interval = self.config['betting'].get('check_interval_seconds', 60)
         balance_update_counter = 0
+        error_backoff = INITIAL_ERROR_BACKOFF_SECONDS
         
         while self.running:
             try:
@@ -322,13 +681,11 @@ class BotRunner:
                 
                 # Get races
                 races = self.client.get_australian_thoroughbred_races(hours_ahead=2)
+                self.forget_finished_markets(races)
                 
                 if races:
                     add_log(f"📋 Found {len(races)} upcoming races")
-                    for race in races:
-                        if not self.running:
-                            break
-                        self.process_race(race)
+                    self.analyze_races(races)
                 else:
                     add_log("ℹ️ No upcoming races found")
                 
@@ -340,25 +697,32 @@ class BotRunner:
                 
                 # Wait
                 if self.running:
-                    add_log(f"⏳ Waiting {check_interval} seconds...")
-                    time.sleep(check_interval)
+                    wait_seconds = self.next_wait_seconds(races)
+                    add_log(f"⏳ Waiting {wait_seconds:.0f} seconds...")
+                    self.stop_event.wait(wait_seconds)
+                
+                error_backoff = INITIAL_ERROR_BACKOFF_SECONDS
                 
             except Exception as e:
-                add_log(f"❌ Bot error: {str(e)}")
+                # Exponential backoff with jitter: quick retry on a blip,
+                # backing off up to MAX_ERROR_BACKOFF_SECONDS on outages
+                delay = error_backoff + random.uniform(0, 1)
+                add_log(f"❌ Bot error: {str(e)} - retrying in {delay:.0f}s")
                 logger.exception("Bot loop error details:")
-                time.sleep(30)
+                self.stop_event.wait(delay)
+                error_backoff = min(error_backoff * 2, MAX_ERROR_BACKOFF_SECONDS)
         
         add_log("🛑 Bot stopped")
 
 def run_bot_thread(config):
     """Background thread for bot"""
-    global bot_instance, bot_running
+    global bot_instance
     
     if not BETFAIR_AVAILABLE:
         add_log("⚠️ Running in DEMO MODE - No Betfair connection")
         while bot_running:
             add_log("💤 Demo mode: Waiting for Betfair modules...")
-            time.sleep(10)
+            bot_stop_event.wait(10)
         return
     
     try:
@@ -368,62 +732,125 @@ def run_bot_thread(config):
             bot_instance.run()
         else:
             add_log("❌ Bot initialization failed")
-            bot_running = False
+            set_bot_running(False)
     except Exception as e:
         add_log(f"❌ Bot thread error: {str(e)}")
         logger.exception("Bot thread error details:")
-        bot_running = False
+        set_bot_running(False)
+
+# Dashboard page bytes: the template has no variables, so it is rendered
+# once and served from memory (re-rendered every time in debug mode)
+_dashboard_page = None
+
+def get_dashboard_page():
+    """Rendered dashboard HTML, its gzipped form and ETag"""
+    global _dashboard_page
+    if _dashboard_page is None or app.debug:
+        page = render_template('dashboard.html').encode('utf-8')
+        _dashboard_page = {
+            "html": page,
+            "gzip": gzip.compress(page),
+            "etag": hashlib.md5(page).hexdigest()
+        }
+    return _dashboard_page
 
 # Flask Routes
 @app.route('/')
 def index():
     """Serve dashboard HTML"""
-    return render_template('dashboard.html')
+    page = get_dashboard_page()
+    
+    if request.accept_encodings['gzip']:
+        response = Response(page["gzip"], mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(page["etag"] + "-gzip")
+    else:
+        response = Response(page["html"], mimetype='text/html')
+        response.set_etag(page["etag"])
+    
+    response.vary.add('Accept-Encoding')
+    return response.make_conditional(request)
 
 @app.route('/api/status')
 def get_status():
     """Get current bot status"""
     config = load_config()
     
-    # Sanitize session token for display
-    display_token = ""
-    if config.get('session_token'):
-        token = config['session_token']
-        if len(token) > 10:
-            display_token = token[:10] + "..." + token[-4:]
-        else:
-            display_token = token[:4] + "..."
-    
-    # Sanitize app key
-    display_app_key = ""
-    if config.get('app_key'):
-        key = config['app_key']
-        if len(key) > 10:
-            display_app_key = key[:10] + "..." + key[-4:]
-        else:
-            display_app_key = key[:4] + "..."
+    # Incremental polling: clients pass back the log_seq / stats_version
+    # they last saw and only receive what changed since then. Each log is
+    # sent with its seq so clients can skip entries the event stream
+    # already delivered
+    since = request.args.get('since', type=int)
+    known_stats_version = request.args.get('stats_version', type=int)
     
-    with bot_lock:
-        stats_copy = bot_stats.copy()
+    # Published stats are never mutated and come pre-encoded, so no lock,
+    # copy or re-encoding is needed
+    current_stats_version, stats_dict, stats_json = stats_snapshot
+    stats_changed = known_stats_version != current_stats_version
+    log_seq, logs = get_recent_logs(since or 0)
     
-    return jsonify({
+    response = {
         "status": "running" if bot_running else "stopped",
-        "balance": stats_copy.get('balance', 0.0),
         "currency": config.get('account', {}).get('currency', 'AUD'),
-        "stats": stats_copy,
-        "config": {
-            **config.get('betting', {}),
-            "session_token": display_token,
-            "app_key": display_app_key
-        },
-        "logs": get_recent_logs(),
+        "stats_version": current_stats_version,
+        "stats": stats_json if stats_changed else None,
+        "balance": stats_dict.get('balance', 0.0) if stats_changed else None,
+        "log_seq": log_seq,
+        "logs": logs,
         "betfair_available": BETFAIR_AVAILABLE
+    }
+    
+    # Config only changes through /api/config, so send it on full loads only
+    if since is None:
+        response["config"] = load_display_config()
+        response["server_id"] = SERVER_ID
+    
+    # An idle dashboard polls the same delta again and again - answer 304
+    response = jsonify(response)
+    response.set_etag(hashlib.md5(response.get_data()).hexdigest())
+    return response.make_conditional(request)
+
+@app.route('/api/stream')
+def stream_events():
+    """Server-sent event stream of log, stats and status updates"""
+    # Browsers send the last log seq they received when reconnecting
+    resume_from = request.headers.get('Last-Event-ID', type=int)
+    
+    def generate():
+        subscriber = queue.Queue(maxsize=500)
+        with subscribers_lock:
+            event_subscribers.add(subscriber)
+        try:
+            # Replay buffered log entries missed while disconnected
+            # (may overlap the live queue - clients skip seqs already seen)
+            if resume_from is not None:
+                with bot_lock:
+                    missed = [(seq, entry) for seq, entry in bot_logs if seq > resume_from]
+                for seq, entry in missed:
+                    yield format_event('log', {"seq": seq, "entry": entry}, event_id=seq)
+            
+            while True:
+                try:
+                    message = subscriber.get(timeout=15)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    break  # Dropped for falling behind - the client reconnects
+                yield message
+        finally:
+            with subscribers_lock:
+                event_subscribers.discard(subscriber)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
 
 @app.route('/api/start', methods=['POST'])
 def start_bot():
     """Start the bot"""
-    global bot_thread, bot_running
+    global bot_thread
     
     if bot_running:
         return jsonify({"success": False, "message": "Bot is already running"})
@@ -441,13 +868,14 @@ def start_bot():
         
         add_log("🚀 Starting bot...")
         
-        bot_running = True
+        set_bot_running(True)
+        bot_stop_event.clear()
         bot_thread = threading.Thread(target=run_bot_thread, args=(config,), daemon=True)
         bot_thread.start()
         
         return jsonify({"success": True, "message": "Bot started successfully"})
     except Exception as e:
-        bot_running = False
+        set_bot_running(False)
         add_log(f"❌ Failed to start: {str(e)}")
         logger.exception("Start bot error details:")
         return jsonify({"success": False, "message": f"Failed to start bot: {str(e)}"})
@@ -455,16 +883,15 @@ def start_bot():
 @app.route('/api/stop', methods=['POST'])
 def stop_bot():
     """Stop the bot"""
-    global bot_running, bot_instance
-    
     if not bot_running:
         return jsonify({"success": False, "message": "Bot is not running"})
     
     add_log("🛑 Stopping bot...")
-    bot_running = False
+    set_bot_running(False)
+    bot_stop_event.set()
     
     if bot_instance:
-        bot_instance.running = False
+        bot_instance.stop()
     
     return jsonify({"success": True, "message": "Bot stopped successfully"})
 
@@ -478,8 +905,8 @@ def update_config():
         if not new_config:
             return jsonify({"success": False, "message": "No configuration provided"})
         
-        # Load existing config
-        config = load_config()
+        # Copy existing config so the cached one is only replaced on save
+        config = copy.deepcopy(load_config())
         
         # Update session token
         if 'session_token' in new_config:
@@ -511,25 +938,19 @@ def update_config():
             config['betting']['stake'] = float(new_config['stake'])
             add_log(f"💵 Stake set to ${new_config['stake']}")
         
-        # Save config
-        if save_config(config):
-            add_log("⚙️ Configuration saved successfully")
-            
-            # Warn if bot is running
-            if bot_running:
-                return jsonify({
-                    "success": True, 
-                    "message": "Configuration saved! Restart bot to apply changes."
-                })
-            else:
-                return jsonify({
-                    "success": True, 
-                    "message": "Configuration saved successfully!"
-                })
+        # Save config (the file write's outcome is reported in the activity log)
+        save_config(config)
+        
+        # Warn if bot is running
+        if bot_running:
+            return jsonify({
+                "success": True, 
+                "message": "Configuration saved! Restart bot to apply changes."
+            })
         else:
             return jsonify({
-                "success": False, 
-                "message": "Failed to save configuration"
+                "success": True, 
+                "message": "Configuration saved successfully!"
             })
             
     except ValueError as e:
@@ -545,21 +966,11 @@ def update_config():
 @app.route('/api/stats/reset', methods=['POST'])
 def reset_stats():
     """Reset bot statistics"""
-    global bot_stats
-    
     try:
-        with bot_lock:
-            balance = bot_stats.get('balance', 0.0)  # Preserve balance
-            bot_stats = {
-                "total_bets": 0,
-                "total_stake": 0,
-                "total_exposure": 0,
-                "successful_bets": 0,
-                "failed_bets": 0,
-                "last_bet_time": None,
-                "balance": balance
-            }
+        with stats_lock:
+            event = set_stats(new_stats(balance=stats_snapshot[1].get('balance', 0.0)))  # Preserve balance
         
+        publish_event('stats', event)
         add_log("🔄 Statistics reset")
         return jsonify({"success": True, "message": "Statistics reset successfully"})
     except Exception as e:
@@ -568,10 +979,10 @@ def reset_stats():
 @app.route('/api/logs/clear', methods=['POST'])
 def clear_logs():
     """Clear all log entries"""
-    global bot_logs
-    
     try:
-        bot_logs.clear()
+        with bot_lock:
+            bot_logs.clear()
+        publish_event('logs_cleared', {})
         add_log("🗑️ Logs cleared by user")
         return jsonify({"success": True, "message": "Logs cleared successfully"})
     except Exception as e:
@@ -588,4 +999,15 @@ if __name__ == '__main__':
     print("="*70)
     print("\n✅ Server starting...\n")
     
-    app.run(debug=True, host='0.0.0.0', port=5000, use_reloader=False)
\ No newline at end of file
+    # Serve with waitress when installed (each open dashboard holds one
+    # thread for its event stream); otherwise fall back to Flask's
+    # development server. For gunicorn see README.
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+    
+    if serve:
+        serve(app, host='0.0.0.0', port=5000, threads=16, connection_limit=200)
+    else:
+        app.run(host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
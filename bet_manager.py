@@ -2,9 +2,14 @@
 Bet Manager Module - Manages betting decisions and risk
 """
 
+import itertools
 import logging
+from collections import deque
 from datetime import datetime
 
+# Bet records kept in memory (summaries use running totals, not the history)
+MAX_BET_HISTORY = 1000
+
 class BetManager:
     """Manages bets and tracks exposure"""
     
@@ -19,7 +24,13 @@ class BetManager:
         self.stake = stake
         self.per_race_stop_loss = per_race_stop_loss
         self.race_exposure = {}  # Track exposure per race
-        self.placed_bets = []  # History of all bets
+        self.placed_bets = deque(maxlen=MAX_BET_HISTORY)  # Most recent bets
+        
+        # Running totals so summaries don't rescan the bet history
+        self.successful_count = 0
+        self.failed_count = 0
+        self.total_staked = 0.0
+        self.total_exposure = 0.0  # Sum of race_exposure
         self.logger = logging.getLogger(__name__)
     
     def can_bet_on_race(self, market_id):
@@ -51,9 +62,14 @@ class BetManager:
             stake (float): Stake amount
             price (float): Odds
             bet_result (dict): Result from bet placement
+            
+        Returns:
+            dict: The stored bet record
         """
+        timestamp = datetime.now()
         bet_record = {
-            'timestamp': datetime.now(),
+            'timestamp': timestamp,
+            'bet_time': timestamp.strftime('%H:%M:%S'),  # Formatted once for display
             'market_id': market_id,
             'runner_name': runner_name,
             'selection_id': selection_id,
@@ -66,13 +82,19 @@ class BetManager:
         
         self.placed_bets.append(bet_record)
         
-        # Update race exposure
+        # Update race exposure and running totals
         if bet_result.get('success'):
             if market_id not in self.race_exposure:
                 self.race_exposure[market_id] = 0
             self.race_exposure[market_id] += stake
+            self.total_exposure += stake
+            self.successful_count += 1
+            self.total_staked += stake
+        else:
+            self.failed_count += 1
         
         self.logger.info(f"Bet recorded: {runner_name} @ {price} - {'SUCCESS' if bet_result.get('success') else 'FAILED'}")
+        return bet_record
     
     def get_race_exposure(self, market_id):
         """Get current exposure for a race"""
@@ -80,23 +102,18 @@ class BetManager:
     
     def get_total_exposure(self):
         """Get total exposure across all races"""
-        return sum(self.race_exposure.values())
+        return self.total_exposure
     
     def get_bet_count(self):
         """Get total number of bets placed"""
-        return len([b for b in self.placed_bets if b['success']])
+        return self.successful_count
     
     def get_betting_summary(self):
         """Get summary of betting activity"""
-        successful_bets = [b for b in self.placed_bets if b['success']]
-        failed_bets = [b for b in self.placed_bets if not b['success']]
-        
-        total_staked = sum(b['stake'] for b in successful_bets)
-        
         return {
-            'total_bets': len(successful_bets),
-            'failed_bets': len(failed_bets),
-            'total_staked': total_staked,
+            'total_bets': self.successful_count,
+            'failed_bets': self.failed_count,
+            'total_staked': self.total_staked,
             'races_bet_on': len(self.race_exposure),
             'total_exposure': self.get_total_exposure()
         }
@@ -117,7 +134,8 @@ class BetManager:
     
     def print_recent_bets(self, count=5):
         """Print recent bets"""
-        recent = self.placed_bets[-count:]
+        recent = list(itertools.islice(reversed(self.placed_bets), count))
+        recent.reverse()
         
         if not recent:
             print("No bets placed yet.\n")
@@ -129,7 +147,7 @@ class BetManager:
         
         for bet in recent:
             status = "✓" if bet['success'] else "✗"
-            print(f"{status} {bet['timestamp'].strftime('%H:%M:%S')} - {bet['runner_name']} @ {bet['price']} (${bet['stake']})")
+            print(f"{status} {bet['bet_time']} - {bet['runner_name']} @ {bet['price']} (${bet['stake']})")
             if not bet['success']:
                 print(f"   Error: {bet['error']}")
         
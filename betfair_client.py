@@ -4,23 +4,83 @@ Betfair Client Module - Handles all communication with Betfair API
 
 import betfairlightweight
 from betfairlightweight import filters
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 import logging
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Market ids per listMarketBook request (request weight limit with EX_BEST_OFFERS)
+MAX_MARKET_BOOK_IDS = 40
+
+# listMarketBook requests in flight at once when a batch spans several chunks
+MAX_CONCURRENT_BOOK_REQUESTS = 4
+
+# Default bet placement allowance
+MAX_BETS_PER_SECOND = 5
+
+# Kept-alive HTTPS connections to the Betfair API (covers concurrent book requests)
+HTTP_POOL_SIZE = 8
+
+def create_http_session():
+    """
+    HTTP session reusing TLS connections across API calls
+    
+    Only connection failures are retried: a request that may have reached
+    Betfair (e.g. placeOrders) is never re-sent.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2)
+    )
+    session.mount('https://', adapter)
+    return session
+
+class RateLimiter:
+    """Sliding-window rate limiter allowing max_calls per period seconds"""
+    
+    def __init__(self, max_calls, period=1.0):
+        self.max_calls = max_calls
+        self.period = period
+        self.calls = deque()  # Monotonic timestamps of calls in the window
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a call is allowed within the window, then record it"""
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= self.period:
+                    self.calls.popleft()
+                
+                if len(self.calls) < self.max_calls:
+                    self.calls.append(now)
+                    return
+                
+                time.sleep(self.period - (now - self.calls[0]))
 
 class BetfairClient:
     """Handles Betfair API interactions"""
     
-    def __init__(self, app_key, session_token):
+    def __init__(self, app_key, session_token, max_bets_per_second=MAX_BETS_PER_SECOND):
         """
         Initialize Betfair client with session token
         
         Args:
             app_key (str): Betfair application key
             session_token (str): Pre-generated session token
+            max_bets_per_second (int): Bet placement rate limit
         """
         self.app_key = app_key
         self.session_token = session_token
         self.api = None
+        self.bet_rate_limiter = RateLimiter(max_bets_per_second)
         self.logger = logging.getLogger(__name__)
         
     def connect(self):
@@ -30,7 +90,8 @@ class BetfairClient:
             self.api = betfairlightweight.APIClient(
                 username='',  # Not needed with session token
                 password='',  # Not needed with session token
-                app_key=self.app_key
+                app_key=self.app_key,
+                session=create_http_session()  # Keep-alive instead of a new connection per call
             )
             
             # Set the session token manually
@@ -105,24 +166,50 @@ class BetfairClient:
         Returns:
             dict: Market prices or None
         """
-        try:
-            price_filter = filters.price_projection(
-                price_data=['EX_BEST_OFFERS']
-            )
-            
-            market_books = self.api.betting.list_market_book(
-                market_ids=[market_id],
-                price_projection=price_filter
-            )
-            
-            if market_books and len(market_books) > 0:
-                return market_books[0]
-            
-            return None
+        return self.get_market_prices_batch([market_id]).get(market_id)
+    
+    def get_market_prices_batch(self, market_ids):
+        """
+        Get current prices for several markets in as few requests as possible
+        
+        Args:
+            market_ids (list): Betfair market IDs
             
-        except Exception as e:
-            self.logger.error(f"[FAIL] Error getting prices for {market_id}: {str(e)}")
-            return None
+        Returns:
+            dict: Market books keyed by market ID (markets without data are omitted)
+        """
+        price_filter = filters.price_projection(
+            price_data=['EX_BEST_OFFERS']
+        )
+        
+        def fetch_chunk(chunk):
+            try:
+                return self.api.betting.list_market_book(
+                    market_ids=chunk,
+                    price_projection=price_filter
+                )
+            except Exception as e:
+                self.logger.error(f"[FAIL] Error getting prices for {len(chunk)} markets: {str(e)}")
+                return []
+        
+        chunks = [
+            market_ids[start:start + MAX_MARKET_BOOK_IDS]
+            for start in range(0, len(market_ids), MAX_MARKET_BOOK_IDS)
+        ]
+        
+        # Chunks are independent round trips, so a full card fetches them in parallel
+        if len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_BOOK_REQUESTS) as pool:
+                results = list(pool.map(fetch_chunk, chunks))
+        else:
+            results = [fetch_chunk(chunk) for chunk in chunks]
+        
+        market_books = {}
+        for chunk_books in results:
+            for market_book in chunk_books:
+                market_books[market_book.market_id] = market_book
+        
+        return market_books
     
     def get_win_lay_price(self, runner):
         """
@@ -134,13 +221,11 @@ class BetfairClient:
         Returns:
             float or None: Best lay price
         """
-        try:
-            if hasattr(runner, 'ex') and runner.ex.available_to_lay:
-                best_lay = runner.ex.available_to_lay[0]
-                return best_lay.price
-            return None
-        except:
-            return None
+        # ex is None when the book was fetched without exchange prices
+        ex = runner.ex
+        if ex is not None and ex.available_to_lay:
+            return ex.available_to_lay[0].price
+        return None
     
     def get_place_back_price(self, runner):
         """
@@ -152,13 +237,10 @@ class BetfairClient:
         Returns:
             float or None: Best back price
         """
-        try:
-            if hasattr(runner, 'ex') and runner.ex.available_to_back:
-                best_back = runner.ex.available_to_back[0]
-                return best_back.price
-            return None
-        except:
-            return None
+        ex = runner.ex
+        if ex is not None and ex.available_to_back:
+            return ex.available_to_back[0].price
+        return None
     
     def get_place_market_id(self, win_market_id):
         """
@@ -200,6 +282,50 @@ class BetfairClient:
             self.logger.error(f"[FAIL] Error finding place market: {str(e)}")
             return None
     
+    def get_place_market_ids(self, win_markets):
+        """
+        Find the place markets for several win markets in one request
+        
+        A race's place market belongs to the same event (meeting) and starts
+        at the same time as its win market.
+        
+        Args:
+            win_markets (list): Win market catalogues (with EVENT and MARKET_START_TIME)
+            
+        Returns:
+            dict or None: Place market ID keyed by win market ID (races without
+                one are omitted), or None if the request failed
+        """
+        if not win_markets:
+            return {}
+        
+        try:
+            place_markets = self.api.betting.list_market_catalogue(
+                filter=filters.market_filter(
+                    event_ids=list({market.event.id for market in win_markets}),
+                    market_type_codes=['PLACE']
+                ),
+                max_results=1000,
+                market_projection=['EVENT', 'MARKET_START_TIME']
+            )
+            
+            place_by_race = {
+                (market.event.id, market.market_start_time): market.market_id
+                for market in place_markets
+            }
+            
+            place_market_ids = {}
+            for market in win_markets:
+                place_id = place_by_race.get((market.event.id, market.market_start_time))
+                if place_id:
+                    place_market_ids[market.market_id] = place_id
+            
+            return place_market_ids
+            
+        except Exception as e:
+            self.logger.error(f"[FAIL] Error finding place markets: {str(e)}")
+            return None
+    
     def place_bet(self, market_id, selection_id, stake, price):
         """
         Place a back bet on Betfair
@@ -213,6 +339,9 @@ class BetfairClient:
         Returns:
             dict: Bet placement result
         """
+        # Stay within the transaction allowance instead of failing and retrying
+        self.bet_rate_limiter.acquire()
+        
         try:
             instruction = filters.place_instruction(
                 order_type='LIMIT',
@@ -2,6 +2,11 @@
 Calculator Module - Implements Patrick's Place Betting Formula
 """
 
+import functools
+
+# Distinct (divisor, win lay, place back) decisions remembered per calculator
+DECISION_CACHE_SIZE = 4096
+
 class BettingCalculator:
     """Calculates fair place odds and minimum required odds"""
     
@@ -12,6 +17,10 @@ class BettingCalculator:
             9: 4, 10: 4, 11: 4, 12: 4, 13: 4, 14: 4
         }
         self.safety_margin = 1.10  # 10% buffer for commission
+        
+        # Prices sit on Betfair's tick grid and rarely move between scans,
+        # so most decisions repeat; cache them per instance
+        self._decide_cached = functools.lru_cache(maxsize=DECISION_CACHE_SIZE)(self._decide)
     
     def get_divisor(self, num_runners):
         """Get divisor based on number of runners"""
@@ -97,6 +106,40 @@ class BettingCalculator:
         }
         
         return should_place_bet, details
+    
+    def should_bet_batch(self, win_lay_prices, actual_place_prices, num_runners):
+        """
+        Determine which runners in a race to bet on
+        
+        Same decision as should_bet, but the divisor is resolved once per race,
+        no details dict is built per runner and repeated prices hit a cache.
+        
+        Args:
+            win_lay_prices (list): Win market lay price per runner
+            actual_place_prices (list): Best back price in place market per runner
+            num_runners (int): Number of runners in race
+            
+        Returns:
+            list: (should_bet: bool, edge: float) per runner
+        """
+        divisor = self.get_divisor(num_runners)
+        
+        if divisor is None:
+            return [(False, 0)] * len(win_lay_prices)
+        
+        return [
+            self._decide_cached(divisor, round(win_lay_price, 2), round(actual_place_price, 2))
+            for win_lay_price, actual_place_price in zip(win_lay_prices, actual_place_prices)
+        ]
+    
+    def _decide(self, divisor, win_lay_price, actual_place_price):
+        """Bet decision for one runner: (should_bet: bool, edge: float)"""
+        place_fair = ((win_lay_price - 1) / divisor) + 1
+        place_min = 1 + (place_fair - 1) * self.safety_margin
+        
+        if actual_place_price >= place_min:
+            return True, round(actual_place_price - place_min, 2)
+        return False, 0
 
 
 # Test the calculator with Patrick's example